@@ -4,15 +4,29 @@ Maritime document processing and event extraction system
 Maritime document processing and event extraction system.
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import DatabaseError
+from sqlalchemy.orm import selectinload
 from werkzeug.utils import secure_filename
+from urllib.parse import quote
 import os
+import re
+import unicodedata
+import hashlib
+import ssl
 import logging
 from datetime import datetime
 import uuid
 
+try:
+    import orjson
+    from flask.json.provider import JSONProvider
+except ImportError:
+    orjson = None
+
 try:
     from config import Config
 except ImportError:
@@ -38,9 +52,11 @@ except ImportError:
         file_path = db.Column(db.String(500), nullable=False)
         file_size = db.Column(db.Integer, nullable=False)
         file_hash = db.Column(db.String(64), nullable=False, unique=True)
+        hash_algorithm = db.Column(db.String(16), nullable=False, default='sha256')
         status = db.Column(db.String(20), default='uploaded')
         created_at = db.Column(db.DateTime, default=datetime.utcnow)
         processed_at = db.Column(db.DateTime)
+        events = db.relationship('Event', backref='document', lazy=True, order_by='Event.created_at')
         
         def to_dict(self):
             return {
@@ -55,6 +71,8 @@ except ImportError:
     
     class Event(db.Model):
         __tablename__ = 'events'
+        # Also serves lookups by document_id alone, as its leading column
+        __table_args__ = (db.Index('ix_events_doc_type', 'document_id', 'event_type'),)
         id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
         document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
         event_type = db.Column(db.String(50), nullable=False)
@@ -62,6 +80,7 @@ except ImportError:
         start_time = db.Column(db.String(50))
         end_time = db.Column(db.String(50))
         duration = db.Column(db.String(20))
+        duration_minutes = db.Column(db.Integer)
         location = db.Column(db.String(255))
         remarks = db.Column(db.Text)
         confidence = db.Column(db.Float, default=0.0)
@@ -126,48 +145,68 @@ except ImportError:
             return f"I understand you're asking about: {message}. Based on the document analysis, I can help you with maritime operations and event timelines."
         
         def export_to_csv(self, document, include_confidence, include_remarks, include_metadata):
-            import tempfile
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False)
-            temp_file.write("Event,Type,Start Time,End Time\n")
-            temp_file.write("Sample Event,arrival,2024-03-15 06:45,2024-03-15 07:10\n")
-            temp_file.close()
-            return temp_file.name
+            yield "Event,Type,Start Time,End Time\n"
+            yield "Sample Event,arrival,2024-03-15 06:45,2024-03-15 07:10\n"
         
         def export_to_json(self, document, include_confidence, include_remarks, include_metadata):
-            import tempfile
             import json
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False)
             data = {"events": [{"event": "Sample Event", "type": "arrival"}]}
-            json.dump(data, temp_file)
-            temp_file.close()
-            return temp_file.name
+            yield json.dumps(data)
 
 try:
-    from utils.helpers import allowed_file, get_file_hash
+    from utils.helpers import (
+        allowed_file, has_sha_extensions, new_file_hasher, hash_and_persist, generate_sortable_id
+    )
 except ImportError:
     # Fallback helper functions
-    import hashlib
-    
     def allowed_file(filename):
         if not filename:
             return False
-        allowed_extensions = {'pdf', 'doc', 'docx'}
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+        return filename.lower().endswith(('.pdf', '.doc', '.docx'))
     
-    def get_file_hash(file_path):
-        try:
-            hash_sha256 = hashlib.sha256()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
-        except Exception:
-            return ""
+    def has_sha_extensions():
+        return False
+    
+    def new_file_hasher(algo='sha256'):
+        if algo != 'sha256':
+            raise ValueError(f"Unsupported hash algorithm: {algo}")
+        return hashlib.sha256()
+    
+    def hash_and_persist(src, dst_path, algo='sha256'):
+        hasher = new_file_hasher(algo)
+        with open(dst_path, 'wb') as dst:
+            while (chunk := src.read(1 << 20)):
+                hasher.update(chunk)
+                dst.write(chunk)
+        return hasher.hexdigest()
+    
+    def generate_sortable_id():
+        return str(uuid.uuid4())
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
+if orjson is not None:
+    class OrjsonProvider(JSONProvider):
+        """Serialize API responses with orjson instead of the stdlib encoder"""
+        
+        options = orjson.OPT_NAIVE_UTC
+        
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=self.options).decode()
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+        
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(
+                orjson.dumps(obj, option=self.options), mimetype='application/json'
+            )
+    
+    app.json = OrjsonProvider(app)
+
 # Initialize extensions
 db.init_app(app)
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:5500", "*"])
@@ -188,9 +227,107 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# The upload hash algorithm is fixed by configuration, never picked per host,
+# so the same file gets the same digest wherever it is uploaded
+FILE_HASH_ALGORITHM = app.config.get('FILE_HASH_ALGORITHM', 'sha256')
+# Fail at startup rather than on every upload for an unknown name or missing blake3
+new_file_hasher(FILE_HASH_ALGORITHM)
+logger.info(f"Upload hashing: {FILE_HASH_ALGORITHM} "
+            f"({ssl.OPENSSL_VERSION}, SHA CPU extensions: {has_sha_extensions()})")
+
+# Event durations are stored as "H:MM:SS"
+DURATION_RE = re.compile(r'^(\d+):(\d+):\d+$')
+
+def duration_to_minutes(duration):
+    """Convert an "H:MM:SS" duration to whole minutes, or None if unparseable"""
+    match = DURATION_RE.match(duration) if duration else None
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else None
+
+# Event columns as served by the API, selected without building ORM objects
+EVENT_COLS = select(
+    Event.id,
+    Event.event_name.label('event'),
+    Event.event_type,
+    Event.start_time,
+    Event.end_time,
+    Event.duration,
+    Event.location,
+    Event.remarks,
+    Event.confidence
+)
+
+def event_rows(document_id, event_type=None):
+    """Fetch a document's events as plain dicts in extraction order"""
+    stmt = EVENT_COLS.where(Event.document_id == document_id)
+    if event_type:
+        stmt = stmt.where(Event.event_type == event_type)
+    rows = db.session.execute(stmt.order_by(Event.created_at, Event.id)).mappings().all()
+    return [dict(row) for row in rows]
+
+def attachment_names(filename):
+    """Content-Disposition filename parameters, with an RFC 5987 filename* for non-ASCII names"""
+    simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+    if simple == filename:
+        return {'filename': filename}
+    return {'filename': simple, 'filename*': "UTF-8''" + quote(filename, safe="!#$&+^`|")}
+
+def column_names(table_name):
+    """Names of the columns table_name currently has in the database"""
+    return {column['name'] for column in inspect(db.engine).get_columns(table_name)}
+
+def add_missing_columns(table_name, columns):
+    """
+    ALTER TABLE to add columns introduced after table_name was created; returns the names added
+    
+    Every gunicorn worker runs this on import, so a column another worker added
+    between the check and the ALTER is skipped rather than failing startup.
+    """
+    existing = column_names(table_name)
+    added = []
+    for name, ddl in columns.items():
+        if name in existing:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {ddl}'))
+        except DatabaseError:
+            if name not in column_names(table_name):
+                raise
+            continue
+        logger.info(f"Added column {table_name}.{name}")
+        added.append(name)
+    return added
+
+def backfill_duration_minutes():
+    """Fill duration_minutes from the stored "H:MM:SS" strings where it is unset; returns the rows examined"""
+    durations = db.session.execute(
+        select(Event.id, Event.duration)
+        .where(Event.duration_minutes.is_(None), Event.duration.isnot(None))
+    ).all()
+    db.session.bulk_update_mappings(Event, [
+        {'id': event_id, 'duration_minutes': duration_to_minutes(duration)}
+        for event_id, duration in durations
+    ])
+    db.session.commit()
+    return len(durations)
+
 # Create tables
 with app.app_context():
     db.create_all()
+    # create_all() skips existing tables, so add columns and indexes introduced since
+    add_missing_columns('documents', {
+        'hash_algorithm': "VARCHAR(16) NOT NULL DEFAULT 'sha256'"
+    })
+    # Only the worker whose ALTER added the column backfills it
+    if add_missing_columns('events', {'duration_minutes': 'INTEGER'}):
+        backfill_duration_minutes()
+    for index in Event.__table__.indexes:
+        try:
+            index.create(db.engine, checkfirst=True)
+        except DatabaseError:
+            # Another worker created it between the check and the CREATE INDEX
+            if index.name not in {ix['name'] for ix in inspect(db.engine).get_indexes(index.table.name)}:
+                raise
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -228,20 +365,19 @@ def upload_document():
         unique_filename = f"{uuid.uuid4()}_{filename}"
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
         
-        # Save file
-        file.save(file_path)
-        
-        # Calculate file hash for deduplication
-        file_hash = get_file_hash(file_path)
+        # Save file, hashing it for deduplication in the same pass
+        file_hash = hash_and_persist(file.stream, file_path, FILE_HASH_ALGORITHM)
         
         # Check if document already processed
-        existing_doc = Document.query.filter_by(file_hash=file_hash).first()
+        existing_doc = Document.query.filter_by(
+            file_hash=file_hash, hash_algorithm=FILE_HASH_ALGORITHM
+        ).first()
         if existing_doc:
             logger.info(f"Document already processed: {existing_doc.id}")
             return jsonify({
                 'document_id': existing_doc.id,
                 'message': 'Document already processed',
-                'events': [event.to_dict() for event in existing_doc.events]
+                'events': event_rows(existing_doc.id)
             })
         
         # Create document record
@@ -250,7 +386,8 @@ def upload_document():
             original_filename=file.filename,
             file_path=file_path,
             file_size=file_size,
-            file_hash=file_hash
+            file_hash=file_hash,
+            hash_algorithm=FILE_HASH_ALGORITHM
         )
         
         db.session.add(document)
@@ -278,7 +415,7 @@ def process_document(document_id):
         if document.status == 'processed':
             return jsonify({
                 'message': 'Document already processed',
-                'events': [event.to_dict() for event in document.events]
+                'events': event_rows(document.id)
             })
         
         # Update status
@@ -295,20 +432,26 @@ def process_document(document_id):
         # Extract events using AI
         extracted_events = event_extractor.extract_events(text_content)
         
-        # Save events to database
-        for event_data in extracted_events:
-            event = Event(
-                document_id=document.id,
-                event_type=event_data['event_type'],
-                event_name=event_data['event'],
-                start_time=event_data.get('start_time'),
-                end_time=event_data.get('end_time'),
-                duration=event_data.get('duration'),
-                location=event_data.get('location'),
-                remarks=event_data.get('remarks'),
-                confidence=event_data.get('confidence', 0.0)
-            )
-            db.session.add(event)
+        # Save events to database in a single executemany, bypassing the ORM unit of work.
+        # Rows in one batch can share created_at, so hand out ids in ascending order
+        # to keep extraction order as the tiebreaker.
+        event_ids = sorted(generate_sortable_id() for _ in extracted_events)
+        db.session.bulk_insert_mappings(Event, [
+            {
+                'id': event_id,
+                'document_id': document.id,
+                'event_type': event_data['event_type'],
+                'event_name': event_data['event'],
+                'start_time': event_data.get('start_time'),
+                'end_time': event_data.get('end_time'),
+                'duration': event_data.get('duration'),
+                'location': event_data.get('location'),
+                'remarks': event_data.get('remarks'),
+                'confidence': event_data.get('confidence', 0.0),
+                'duration_minutes': duration_to_minutes(event_data.get('duration'))
+            }
+            for event_id, event_data in zip(event_ids, extracted_events)
+        ])
         
         # Update document status
         document.status = 'processed'
@@ -317,10 +460,11 @@ def process_document(document_id):
         
         logger.info(f"Document processed successfully: {document_id}")
         
+        events = event_rows(document.id)
         return jsonify({
             'message': 'Document processed successfully',
-            'events': [event.to_dict() for event in document.events],
-            'total_events': len(document.events)
+            'events': events,
+            'total_events': len(events)
         })
         
     except Exception as e:
@@ -335,15 +479,15 @@ def get_events(document_id):
     try:
         document = Document.query.get_or_404(document_id)
         
-        # Filter by event type if specified
+        # Filter by event type in SQL if specified
         event_type = request.args.get('type')
-        events = document.events
+        if event_type == 'all':
+            event_type = None
         
-        if event_type and event_type != 'all':
-            events = [e for e in events if e.event_type == event_type]
+        events = event_rows(document.id, event_type)
         
         return jsonify({
-            'events': [event.to_dict() for event in events],
+            'events': events,
             'total': len(events)
         })
         
@@ -365,7 +509,7 @@ def chat():
         # Get document context if provided
         document = None
         if document_id:
-            document = Document.query.get(document_id)
+            document = Document.query.options(selectinload(Document.events)).get(document_id)
         
         # Generate AI response
         response = ai_service.generate_response(message, document)
@@ -385,24 +529,35 @@ def chat():
 def export_data(document_id, format):
     """Export document events in CSV or JSON format"""
     try:
-        document = Document.query.get_or_404(document_id)
+        document = Document.query.options(selectinload(Document.events)).get_or_404(document_id)
         
         # Get export options
         include_confidence = request.args.get('confidence', 'true').lower() == 'true'
         include_remarks = request.args.get('remarks', 'true').lower() == 'true'
         include_metadata = request.args.get('metadata', 'false').lower() == 'true'
         
+        # Exports are streamed straight into the response
         if format.lower() == 'csv':
-            file_path = ai_service.export_to_csv(
+            chunks = ai_service.export_to_csv(
                 document, include_confidence, include_remarks, include_metadata
             )
-            return send_file(file_path, as_attachment=True, download_name=f"{document.original_filename}_events.csv")
+            response = Response(stream_with_context(chunks), mimetype='text/csv')
+            response.headers.set(
+                'Content-Disposition', 'attachment',
+                **attachment_names(f'{document.original_filename}_events.csv')
+            )
+            return response
         
         elif format.lower() == 'json':
-            file_path = ai_service.export_to_json(
+            chunks = ai_service.export_to_json(
                 document, include_confidence, include_remarks, include_metadata
             )
-            return send_file(file_path, as_attachment=True, download_name=f"{document.original_filename}_events.json")
+            response = Response(stream_with_context(chunks), mimetype='application/json')
+            response.headers.set(
+                'Content-Disposition', 'attachment',
+                **attachment_names(f'{document.original_filename}_events.json')
+            )
+            return response
         
         else:
             return jsonify({'error': 'Invalid format. Use csv or json'}), 400
@@ -420,42 +575,39 @@ def get_summary(document_id):
         if document.status != 'processed':
             return jsonify({'error': 'Document not yet processed'}), 400
         
-        # Calculate statistics
-        events = document.events
-        event_types = {}
-        total_duration = 0
+        # Aggregate statistics in the database, one row per event type
+        stats = db.session.query(
+            Event.event_type,
+            db.func.count(Event.id),
+            db.func.sum(Event.duration_minutes),
+            db.func.sum(Event.confidence)
+        ).filter_by(document_id=document.id).group_by(Event.event_type).all()
         
-        for event in events:
-            event_type = event.event_type
-            event_types[event_type] = event_types.get(event_type, 0) + 1
-            
-            # Calculate duration if available
-            if event.duration:
-                try:
-                    # Parse duration (assuming format like "1:30:00")
-                    parts = event.duration.split(':')
-                    if len(parts) == 3:
-                        hours = int(parts[0])
-                        minutes = int(parts[1])
-                        total_duration += hours * 60 + minutes
-                except:
-                    pass
+        event_types = {event_type: count for event_type, count, _, _ in stats}
+        total_events = sum(event_types.values())
+        total_duration = sum(minutes or 0 for _, _, minutes, _ in stats)
+        confidence_sum = sum(confidence or 0.0 for _, _, _, confidence in stats)
+        
+        timeline = Event.query.with_entities(Event.start_time, Event.end_time) \
+            .filter_by(document_id=document.id)
+        first_event = timeline.order_by(Event.created_at, Event.id).first()
+        last_event = timeline.order_by(Event.created_at.desc(), Event.id.desc()).first()
         
         summary = {
             'document_info': {
                 'filename': document.original_filename,
                 'size': document.file_size,
                 'processed_at': document.processed_at.isoformat() if document.processed_at else None,
-                'total_events': len(events)
+                'total_events': total_events
             },
             'statistics': {
                 'event_distribution': event_types,
                 'total_duration_minutes': total_duration,
-                'average_confidence': sum(e.confidence for e in events) / len(events) if events else 0
+                'average_confidence': confidence_sum / total_events if total_events else 0
             },
             'timeline': {
-                'first_event': events[0].start_time if events else None,
-                'last_event': events[-1].end_time or events[-1].start_time if events else None
+                'first_event': first_event.start_time if first_event else None,
+                'last_event': last_event.end_time or last_event.start_time if last_event else None
             }
         }
         
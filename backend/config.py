@@ -13,6 +13,10 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB
     
+    # Upload dedup hash: 'sha256' or 'blake3'. Keep it the same on every host, since
+    # dedup only compares hashes of the algorithm each document records.
+    FILE_HASH_ALGORITHM = os.environ.get('FILE_HASH_ALGORITHM', 'sha256')
+    
     # AI service settings
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-3.5-turbo')
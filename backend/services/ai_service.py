@@ -4,27 +4,61 @@ Handles chat functionality and intelligent responses about maritime documents
 """
 
 import os
+import io
+import hashlib
 import json
 import csv
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime
-import tempfile
 import re
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of chat responses kept in memory per process
+RESPONSE_CACHE_SIZE = 1024
+
+# Longer messages are answered without caching; they are rarely repeated verbatim
+RESPONSE_CACHE_MAX_MESSAGE = 1024
+
+# Exports are streamed in pieces of about this many characters; each piece
+# becomes one chunked-transfer write
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def _batched(chunks: Iterator[str], size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Join small text chunks into pieces of at least size characters"""
+    pending = []
+    pending_len = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_len += len(chunk)
+        if pending_len >= size:
+            yield "".join(pending)
+            pending.clear()
+            pending_len = 0
+    if pending:
+        yield "".join(pending)
+
 class AIService:
     """Service for AI-powered chat and document analysis"""
     
     def __init__(self):
         self.chat_context = {}
         self.response_templates = self._initialize_response_templates()
+        self._response_cache = OrderedDict()
+        self._response_cache_lock = threading.Lock()
         
     def generate_response(self, message: str, document=None) -> str:
         """
         Generate AI response to user query
         
+        Responses are memoized per message digest and document state (id,
+        status, processed_at), so reprocessing a document misses the cache in
+        every worker without any explicit invalidation. Messages longer than
+        RESPONSE_CACHE_MAX_MESSAGE characters are not cached.
+        
         Args:
             message: User's message/question
             document: Document object with events (optional)
@@ -32,6 +66,19 @@ class AIService:
         Returns:
             AI-generated response
         """
+        key = None
+        if len(message) <= RESPONSE_CACHE_MAX_MESSAGE:
+            digest = hashlib.sha256(message.encode('utf-8', 'surrogatepass')).digest()
+            if document:
+                key = (digest, document.id, document.status, document.processed_at)
+            else:
+                key = (digest, None, None, None)
+            with self._response_cache_lock:
+                cached = self._response_cache.get(key)
+                if cached is not None:
+                    self._response_cache.move_to_end(key)
+                    return cached
+        
         try:
             logger.info(f"Generating response for message: {message[:50]}...")
             
@@ -52,11 +99,17 @@ class AIService:
             # Post-process response
             final_response = self._postprocess_response(response)
             
-            return final_response
-            
         except Exception as e:
             logger.error(f"Response generation failed: {str(e)}")
             return self._get_error_response()
+        
+        if key is not None:
+            with self._response_cache_lock:
+                self._response_cache[key] = final_response
+                if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
+        
+        return final_response
     
     def _initialize_response_templates(self) -> Dict[str, Dict[str, Any]]:
         """Initialize response templates for different query types"""
@@ -279,10 +332,8 @@ class AIService:
         """Generate summary response"""
         total_events = len(events)
         
-        # Group events by type
-        event_types = {}
-        for event in events:
-            event_types[event.event_type] = event_types.get(event.event_type, 0) + 1
+        # Count events by type
+        event_types = Counter(event.event_type for event in events)
         
         # Generate operations summary
         operations_summary = []
@@ -308,9 +359,8 @@ class AIService:
         
         # Generate issues summary
         issues_summary = []
-        weather_events = [e for e in events if e.event_type == 'weather']
-        if weather_events:
-            issues_summary.append(f"• {len(weather_events)} weather delay(s)")
+        if event_types['weather']:
+            issues_summary.append(f"• {event_types['weather']} weather delay(s)")
         
         issues_summary.append("• All operations completed successfully")
         
@@ -413,10 +463,13 @@ class AIService:
             return 0.0
     
     def export_to_csv(self, document, include_confidence=True, 
-                     include_remarks=True, include_metadata=False) -> str:
+                     include_remarks=True, include_metadata=False) -> Iterator[str]:
         """
         Export document events to CSV format
         
+        Rows are produced lazily so the caller can stream them straight
+        into the response without a temporary file.
+        
         Args:
             document: Document object with events
             include_confidence: Include confidence scores
@@ -424,16 +477,18 @@ class AIService:
             include_metadata: Include document metadata
             
         Returns:
-            Path to generated CSV file
+            Iterator over CSV text in chunks of about EXPORT_CHUNK_SIZE characters
         """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        def flush() -> str:
+            row_text = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return row_text
+        
         try:
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(
-                mode='w', suffix='.csv', delete=False, encoding='utf-8'
-            )
-            
-            writer = csv.writer(temp_file)
-            
             # Write header
             header = ['Event', 'Event Type', 'Start Time', 'End Time', 'Duration', 'Location']
             if include_confidence:
@@ -461,6 +516,8 @@ class AIService:
                     row.append(event.remarks or '')
                 
                 writer.writerow(row)
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    yield flush()
             
             # Add metadata if requested
             if include_metadata:
@@ -471,20 +528,22 @@ class AIService:
                 writer.writerow(['Total Events', len(document.events)])
                 writer.writerow(['File Size', f"{document.file_size} bytes" if document.file_size else 'Unknown'])
             
-            temp_file.close()
+            yield flush()
             
-            logger.info(f"CSV export completed: {temp_file.name}")
-            return temp_file.name
+            logger.info(f"CSV export completed: {document.id}")
             
         except Exception as e:
             logger.error(f"CSV export failed: {str(e)}")
             raise
     
     def export_to_json(self, document, include_confidence=True, 
-                      include_remarks=True, include_metadata=False) -> str:
+                      include_remarks=True, include_metadata=False) -> Iterator[str]:
         """
         Export document events to JSON format
         
+        The document is encoded incrementally so the caller can stream it
+        straight into the response without a temporary file.
+        
         Args:
             document: Document object with events
             include_confidence: Include confidence scores
@@ -492,14 +551,9 @@ class AIService:
             include_metadata: Include document metadata
             
         Returns:
-            Path to generated JSON file
+            Iterator over JSON text in chunks of about EXPORT_CHUNK_SIZE characters
         """
         try:
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(
-                mode='w', suffix='.json', delete=False, encoding='utf-8'
-            )
-            
             # Prepare export data
             export_data = {
                 'events': []
@@ -536,12 +590,10 @@ class AIService:
                     'extraction_method': 'hybrid_nlp_regex'
                 }
             
-            # Write JSON
-            json.dump(export_data, temp_file, indent=2, ensure_ascii=False)
-            temp_file.close()
+            # Encode JSON
+            yield from _batched(json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(export_data))
             
-            logger.info(f"JSON export completed: {temp_file.name}")
-            return temp_file.name
+            logger.info(f"JSON export completed: {document.id}")
             
         except Exception as e:
             logger.error(f"JSON export failed: {str(e)}")
@@ -5,19 +5,29 @@ Utility functions for SoF Event Extractor
 from .helpers import (
     allowed_file,
     get_file_hash,
+    has_sha_extensions,
+    preferred_hash_algorithm,
+    new_file_hasher,
+    hash_and_persist,
     format_duration,
     parse_datetime,
     sanitize_filename,
     validate_email,
-    generate_unique_id
+    generate_unique_id,
+    generate_sortable_id
 )
 
 __all__ = [
     'allowed_file',
     'get_file_hash',
+    'has_sha_extensions',
+    'preferred_hash_algorithm',
+    'new_file_hasher',
+    'hash_and_persist',
     'format_duration',
     'parse_datetime',
     'sanitize_filename',
     'validate_email',
-    'generate_unique_id'
+    'generate_unique_id',
+    'generate_sortable_id'
 ]
@@ -4,14 +4,61 @@ Helper utility functions for SoF Event Extractor
 
 import os
 import hashlib
+import mmap
 import re
+import threading
+import time
 import uuid
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Union, List
 import logging
 
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
 logger = logging.getLogger(__name__)
 
+_ALLOWED_SUFFIXES = ('.pdf', '.doc', '.docx')
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+# Leaf size of the 'sha256-tree' fingerprint; fixed so digests do not depend
+# on the machine's core count
+_TREE_LEAF_SIZE = 8 << 20
+
+# Per-thread readinto buffer for _compute_file_hash
+_hash_buffer = threading.local()
+
+# Digests of files already hashed, keyed by (realpath, size, mtime_ns, algo)
+_HASH_CACHE_MAX = 4096
+_hash_cache = OrderedDict()
+_hash_cache_lock = threading.Lock()
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB")
+
+# Per-thread block of random bytes backing generate_unique_id
+_ID_POOL_SIZE = 256
+_id_pool = threading.local()
+
+# Common datetime formats in maritime documents, most frequent first
+_DATETIME_FORMATS = (
+    "%d/%m/%Y %H:%M",
+    "%H:%M",
+    "%d/%m/%Y",
+    "%d.%m.%Y %H:%M",
+    "%d-%m-%Y %H:%M",
+    "%d.%m.%Y",
+    "%d-%m-%Y",
+    "%H.%M",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+)
+
 def allowed_file(filename: str) -> bool:
     """
     Check if file extension is allowed
@@ -25,29 +72,187 @@ def allowed_file(filename: str) -> bool:
     if not filename:
         return False
     
-    allowed_extensions = {'pdf', 'doc', 'docx'}
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
 
-def get_file_hash(file_path: str) -> str:
+def get_file_hash(file_path: str, algo: str = 'sha256') -> str:
     """
-    Calculate SHA-256 hash of a file
+    Calculate hash of a file
+    
+    Results are cached by path, size and modification time, so a file that
+    has not been rewritten since it was last hashed is not read again.
     
     Args:
         file_path: Path to the file
+        algo: 'sha256' (default), 'blake3' or 'sha256-tree'. The latter two
+              use all cores on large files but should only be used where
+              hashes are compared for equality (dedup, cache keys), never
+              mixed with stored SHA-256 values. 'sha256-tree' is the SHA-256
+              of the concatenated SHA-256 digests of 8 MiB leaves.
         
     Returns:
-        SHA-256 hash of the file
+        Hex digest of the file (64 characters for every algorithm)
     """
+    if algo not in ('sha256', 'blake3', 'sha256-tree'):
+        raise ValueError(f"Unsupported hash algorithm: {algo}")
+    
     try:
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+        st = os.stat(file_path)
+        key = (os.path.realpath(file_path), st.st_size, st.st_mtime_ns, algo)
+        with _hash_cache_lock:
+            digest = _hash_cache.get(key)
+            if digest is not None:
+                _hash_cache.move_to_end(key)
+                return digest
+        
+        digest = _compute_file_hash(file_path, algo, st.st_size)
     except Exception as e:
         logger.error(f"Error calculating file hash: {str(e)}")
         return ""
+    
+    with _hash_cache_lock:
+        _hash_cache[key] = digest
+        if len(_hash_cache) > _HASH_CACHE_MAX:
+            _hash_cache.popitem(last=False)
+    return digest
+
+def _compute_file_hash(file_path: str, algo: str, size: int) -> str:
+    """Read file_path (size bytes at stat time) and return its hex digest under algo"""
+    if algo == 'blake3':
+        if blake3 is None:
+            raise RuntimeError("blake3 package is not installed")
+        return blake3(max_threads=blake3.AUTO).update_mmap(file_path).hexdigest()
+    
+    if algo == 'sha256-tree':
+        return _tree_hash(file_path, size)
+    
+    if size <= _HASH_CHUNK_SIZE:
+        # Fits in one read; skip the chunk loop
+        with open(file_path, "rb", buffering=0) as f:
+            return hashlib.sha256(f.read(size)).hexdigest()
+    
+    view = _thread_hash_view()
+    hash_sha256 = hashlib.sha256()
+    with open(file_path, "rb", buffering=0) as f:
+        while (read := f.readinto(view)):
+            hash_sha256.update(view[:read])
+    return hash_sha256.hexdigest()
+
+def _tree_hash(file_path: str, size: int) -> str:
+    """Hash _TREE_LEAF_SIZE leaves of file_path in parallel and hash their digests"""
+    if size == 0:
+        # mmap refuses empty files; treat them as a single empty leaf
+        return hashlib.sha256(hashlib.sha256().digest()).hexdigest()
+    
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+        def leaf_digest(offset):
+            # Views must be released before the mapping can close
+            with memoryview(mapped) as view, view[offset:offset + _TREE_LEAF_SIZE] as leaf:
+                return hashlib.sha256(leaf).digest()
+        
+        offsets = range(0, size, _TREE_LEAF_SIZE)
+        # hashlib releases the GIL while hashing large buffers, so threads scale
+        with ThreadPoolExecutor(max_workers=min(len(offsets), os.cpu_count() or 1)) as executor:
+            digests = list(executor.map(leaf_digest, offsets))
+    
+    return hashlib.sha256(b"".join(digests)).hexdigest()
+
+def _thread_hash_view() -> memoryview:
+    """Return this thread's reusable _HASH_CHUNK_SIZE buffer"""
+    view = getattr(_hash_buffer, 'view', None)
+    if view is None:
+        view = _hash_buffer.view = memoryview(bytearray(_HASH_CHUNK_SIZE))
+    return view
+
+def has_sha_extensions() -> bool:
+    """
+    Check whether the CPU advertises SHA-256 instructions
+    
+    OpenSSL (and therefore hashlib) uses x86 SHA-NI or the ARMv8 SHA2
+    extension automatically when present.
+    
+    Returns:
+        True if /proc/cpuinfo lists sha_ni or sha2, False otherwise
+    """
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            cpuinfo = f.read()
+    except OSError:
+        return False
+    
+    return re.search(r'\b(sha_ni|sha2)\b', cpuinfo) is not None
+
+def preferred_hash_algorithm() -> str:
+    """
+    Pick the fastest file hash algorithm available on this machine
+    
+    The answer differs between hosts, so it is only a hint for choosing
+    FILE_HASH_ALGORITHM; uploads never switch algorithm automatically.
+    
+    Returns:
+        'sha256' when it is hardware accelerated or blake3 is not installed,
+        'blake3' otherwise
+    """
+    if blake3 is None or has_sha_extensions():
+        return 'sha256'
+    return 'blake3'
+
+def new_file_hasher(algo: str = 'sha256'):
+    """
+    Create an incremental hasher for streaming file contents
+    
+    Args:
+        algo: 'sha256' or 'blake3'
+        
+    Returns:
+        Hash object with update() and hexdigest() (64 hex characters)
+    """
+    if algo == 'blake3':
+        if blake3 is None:
+            raise RuntimeError("blake3 package is not installed")
+        return blake3()
+    if algo == 'sha256':
+        return hashlib.sha256()
+    raise ValueError(f"Unsupported hash algorithm: {algo}")
+
+def hash_and_persist(src, dst_path: str, algo: str = 'sha256') -> str:
+    """
+    Copy a binary stream to dst_path and hash it in the same pass
+    
+    Each chunk is read once into a reused buffer, hashed, and written
+    out from that buffer. Streams without readinto() (such as
+    SpooledTemporaryFile before Python 3.11) are copied with read().
+    The digest is also recorded in the get_file_hash cache, so hashing
+    dst_path later does not re-read it.
+    
+    Args:
+        src: Readable binary file object (e.g. an upload's stream)
+        dst_path: Destination file path, created or truncated
+        algo: 'sha256' or 'blake3'
+        
+    Returns:
+        Hex digest of the copied bytes
+    """
+    hasher = new_file_hasher(algo)
+    with open(dst_path, 'wb') as dst:
+        if hasattr(src, 'readinto'):
+            view = _thread_hash_view()
+            while (read := src.readinto(view)):
+                chunk = view[:read]
+                hasher.update(chunk)
+                dst.write(chunk)
+        else:
+            while (chunk := src.read(_HASH_CHUNK_SIZE)):
+                hasher.update(chunk)
+                dst.write(chunk)
+    digest = hasher.hexdigest()
+    
+    st = os.stat(dst_path)
+    key = (os.path.realpath(dst_path), st.st_size, st.st_mtime_ns, algo)
+    with _hash_cache_lock:
+        _hash_cache[key] = digest
+        if len(_hash_cache) > _HASH_CACHE_MAX:
+            _hash_cache.popitem(last=False)
+    return digest
 
 def format_duration(seconds: int) -> str:
     """
@@ -84,31 +289,32 @@ def parse_datetime(date_str: str) -> Optional[datetime]:
         date_str: Date/time string to parse
         
     Returns:
-        Parsed datetime object or None if parsing fails
+        Naive datetime object or None if parsing fails; inputs with a UTC
+        offset are converted to UTC
     """
     if not date_str or not isinstance(date_str, str):
         return None
     
-    # Common datetime formats in maritime documents
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%d/%m/%Y %H:%M",
-        "%d-%m-%Y %H:%M",
-        "%d.%m.%Y %H:%M",
-        "%Y-%m-%d",
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%d.%m.%Y",
-        "%H:%M",
-        "%H.%M"
-    ]
-    
     # Clean the input string
     cleaned_str = date_str.strip()
     
+    # ISO-like timestamps are the common case and parse in C
+    iso_str = cleaned_str.replace('/', '-')
+    if iso_str.endswith('Z'):
+        # fromisoformat only accepts the Z suffix from Python 3.11
+        iso_str = iso_str[:-1] + '+00:00'
+    try:
+        parsed_dt = datetime.fromisoformat(iso_str)
+    except ValueError:
+        pass
+    else:
+        # Keep results comparable with the naive values from the other formats
+        if parsed_dt.tzinfo is not None:
+            parsed_dt = parsed_dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed_dt
+    
     # Try each format
-    for fmt in formats:
+    for fmt in _DATETIME_FORMATS:
         try:
             parsed_dt = datetime.strptime(cleaned_str, fmt)
             
@@ -213,14 +419,54 @@ def validate_email(email: str) -> bool:
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email.strip()) is not None
 
+def _random_id_bytes() -> bytes:
+    """Take 16 random bytes from the calling thread's urandom pool"""
+    pool = _id_pool
+    pid = os.getpid()
+    
+    # Refill when exhausted, and never reuse a block inherited across fork()
+    if getattr(pool, 'block', None) is None or pool.offset >= len(pool.block) or pool.pid != pid:
+        pool.block = os.urandom(16 * _ID_POOL_SIZE)
+        pool.offset = 0
+        pool.pid = pid
+    
+    offset = pool.offset
+    pool.offset = offset + 16
+    return pool.block[offset:offset + 16]
+
 def generate_unique_id() -> str:
     """
     Generate a unique identifier
     
+    Random bytes are drawn from os.urandom in blocks of _ID_POOL_SIZE ids
+    per thread, so batch ingest does not pay one syscall per id.
+    
     Returns:
         UUID4 string
     """
-    return str(uuid.uuid4())
+    return str(uuid.UUID(bytes=_random_id_bytes(), version=4))
+
+def generate_sortable_id() -> str:
+    """
+    Generate a time-ordered unique identifier for primary keys
+    
+    Uses the UUIDv7 layout: a 48-bit Unix millisecond timestamp followed by
+    random bits from the same pool as generate_unique_id. Consecutive inserts
+    then land next to each other in the primary key index instead of at
+    random pages.
+    
+    Returns:
+        UUID7 string
+    """
+    rand = int.from_bytes(_random_id_bytes(), 'big')
+    value = (
+        (time.time_ns() // 1_000_000) << 80
+        | 0x7 << 76  # version
+        | (rand >> 64 & 0xFFF) << 64  # rand_a
+        | 0b10 << 62  # RFC 4122 variant
+        | rand & 0x3FFFFFFFFFFFFFFF  # rand_b
+    )
+    return str(uuid.UUID(int=value))
 
 def parse_duration_string(duration_str: str) -> Optional[int]:
     """
@@ -277,14 +523,10 @@ def format_file_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    # Each unit is 2**10 of the previous one, so the bit length picks the unit
+    index = min(max(int(size_bytes).bit_length() - 1, 0) // 10, len(_SIZE_NAMES) - 1)
     
-    return f"{size_bytes:.1f} {size_names[i]}"
+    return f"{size_bytes / (1 << (index * 10)):.1f} {_SIZE_NAMES[index]}"
 
 def extract_vessel_name(text: str) -> Optional[str]:
     """
@@ -11,13 +11,13 @@ import platform
 from pathlib import Path
 
 def run_command(command, description, cwd=None):
-    """Run a command and handle errors"""
+    """Run a command and handle errors; only str commands go through the shell"""
     print(f"\n🔄 {description}...")
     try:
         result = subprocess.run(
-            command, 
-            shell=True, 
-            check=True, 
+            command,
+            shell=isinstance(command, str),
+            check=True,
             cwd=cwd,
             capture_output=True,
             text=True
@@ -31,6 +31,10 @@ def run_command(command, description, cwd=None):
         if e.stderr:
             print(f"Error: {e.stderr}")
         return False
+    except OSError as e:
+        # argv commands raise here when the executable is missing
+        print(f"❌ {description} failed: {e}")
+        return False
 
 def check_python_version():
     """Check if Python version is compatible"""
@@ -69,7 +73,7 @@ def setup_python_environment():
     # Create virtual environment
     if not venv_dir.exists():
         if not run_command(
-            f"python -m venv {venv_dir}", 
+            [sys.executable, "-m", "venv", str(venv_dir)],
             "Creating Python virtual environment",
             cwd="."
         ):
@@ -89,7 +93,7 @@ def setup_python_environment():
     requirements_file = backend_dir / "requirements.txt"
     if requirements_file.exists():
         if not run_command(
-            f"{pip_command} install -r {requirements_file}",
+            [pip_command, "install", "-r", str(requirements_file)],
             "Installing Python dependencies",
             cwd="."
         ):
@@ -108,11 +112,11 @@ def setup_directories():
     ]
     
     for directory in directories:
-        dir_path = Path(directory)
-        if not dir_path.exists():
-            dir_path.mkdir(parents=True, exist_ok=True)
+        # A single mkdir; EEXIST tells us it was already there
+        try:
+            Path(directory).mkdir(parents=True)
             print(f"✅ Created directory: {directory}")
-        else:
+        except FileExistsError:
             print(f"✅ Directory exists: {directory}")
     
     return True
@@ -6,9 +6,125 @@ Tests basic code structure without external dependencies
 
 import os
 import sys
-import ast
+import concurrent.futures
+import functools
+import json
+import mmap
 import re
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Patterns are compiled once at import into a single alternation per file, so
+# each file is scanned once regardless of how many patterns it is checked for.
+# Each pattern has a literal it cannot match without, checked first with a
+# plain substring search so the regex is skipped when none of them occur.
+API_ENDPOINT_PATTERNS = (
+    rb'@app\.route\([\'\"]/api/health[\'\"]\)',
+    rb'@app\.route\([\'\"]/api/upload[\'\"]\)',
+    rb'@app\.route\([\'\"]/api/process/<[^>]+>[\'\"]\)',
+    rb'@app\.route\([\'\"]/api/chat[\'\"]\)',
+    rb'@app\.route\([\'\"]/api/export/<[^>]+>/<[^>]+>[\'\"]\)'
+)
+API_ENDPOINT_LITERALS = (b'/api/health', b'/api/upload', b'/api/process/', b'/api/chat', b'/api/export/')
+
+HTML_ELEMENT_PATTERNS = (
+    rb'<div[^>]*id=[\'"]uploadZone[\'"]',
+    rb'<div[^>]*id=[\'"]resultsSection[\'"]',
+    rb'<div[^>]*id=[\'"]chatTab[\'"]',
+    rb'<input[^>]*id=[\'"]fileInput[\'"]',
+    rb'<button[^>]*id=[\'"]sendChatBtn[\'"]'
+)
+HTML_ELEMENT_LITERALS = (b'uploadZone', b'resultsSection', b'chatTab', b'fileInput', b'sendChatBtn')
+
+JS_FUNC_PATTERNS = (
+    rb'function\s+handleFileSelect',
+    rb'function\s+sendMessage',
+    rb'function\s+uploadDocument',
+    rb'function\s+populateEventsTable'
+)
+JS_FUNC_LITERALS = (b'handleFileSelect', b'sendMessage', b'uploadDocument', b'populateEventsTable')
+
+# Plain literals; the substring search alone decides these. With pyahocorasick
+# installed they are found in one pass over the file instead of one per literal.
+DOCKER_SERVICES = (b'backend:', b'db:', b'redis:', b'nginx:')
+DOCKERFILE_COMMANDS = (b'FROM', b'WORKDIR', b'COPY', b'RUN', b'EXPOSE')
+
+SYNTAX_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.simple_test_cache.json')
+
+PARALLEL_PARSE_MIN_BYTES = 1 << 20
+
+def _alternation(patterns):
+    """Compile bytes patterns into one regex with a named group per pattern"""
+    return re.compile(b'|'.join(b'(?P<p%d>%s)' % (i, p) for i, p in enumerate(patterns)))
+
+# Mappings handed out by _slurp, closed by _release_files when main() ends
+_open_maps = []
+
+@functools.lru_cache(maxsize=None)
+def _slurp(path):
+    """Map a file read-only once per run and return it as a bytes-like object"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap refuses empty files
+            return b''
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _open_maps.append(mapped)
+    return mapped
+
+def _release_files():
+    """Drop the _slurp cache and close its mappings"""
+    _slurp.cache_clear()
+    while _open_maps:
+        _open_maps.pop().close()
+
+def _present(literals, content):
+    """Return the indexes of the literals that occur in content"""
+    return {i for i, literal in enumerate(literals) if content.find(literal) != -1}
+
+def _automaton(literals):
+    """Build an Aho-Corasick automaton yielding literal indexes, or None"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for i, literal in enumerate(literals):
+        automaton.add_word(literal.decode('latin-1'), i)
+    automaton.make_automaton()
+    return automaton
+
+def _found(automaton, literals, content):
+    """Return the indexes of the literals that occur in content"""
+    if automaton is None:
+        return _present(literals, content)
+    return {i for _, i in automaton.iter(content[:].decode('latin-1'))}
+
+def _matched(alternation_re, literals, content):
+    """Return the indexes of the patterns that match anywhere in content"""
+    candidates = _present(literals, content)
+    if not candidates:
+        return candidates
+    return candidates & {int(m.lastgroup[1:]) for m in alternation_re.finditer(content)}
+
+API_ENDPOINT_RE = _alternation(API_ENDPOINT_PATTERNS)
+HTML_ELEMENT_RE = _alternation(HTML_ELEMENT_PATTERNS)
+JS_FUNC_RE = _alternation(JS_FUNC_PATTERNS)
+DOCKER_SERVICES_AUTOMATON = _automaton(DOCKER_SERVICES)
+DOCKERFILE_AUTOMATON = _automaton(DOCKERFILE_COMMANDS)
+
+def _list_files(directories):
+    """Return the set of 'dir/name' paths directly inside each directory"""
+    found = set()
+    for directory in directories:
+        try:
+            with os.scandir(directory or '.') as entries:
+                for entry in entries:
+                    found.add(f'{directory}/{entry.name}' if directory else entry.name)
+        except OSError:
+            continue
+    return found
+
 def test_file_structure():
     """Test if all required files exist"""
     print("🔍 Testing project structure...")
@@ -34,10 +150,9 @@ def test_file_structure():
         'README.md'
     ]
     
-    missing_files = []
-    for file_path in required_files:
-        if not os.path.exists(file_path):
-            missing_files.append(file_path)
+    # One directory listing per parent directory instead of one stat per file
+    found = _list_files({os.path.dirname(file_path) for file_path in required_files})
+    missing_files = [file_path for file_path in required_files if file_path not in found]
     
     if missing_files:
         print(f"❌ Missing files: {missing_files}")
@@ -46,6 +161,38 @@ def test_file_structure():
         print(f"✅ All {len(required_files)} required files exist")
         return True
 
+def _load_syntax_cache():
+    """Load {path: [mtime_ns, size, error]} from the syntax cache sidecar"""
+    try:
+        with open(SYNTAX_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_syntax_cache(cache):
+    """Atomically replace the syntax cache sidecar"""
+    tmp_path = f'{SYNTAX_CACHE_FILE}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, SYNTAX_CACHE_FILE)
+    except OSError as e:
+        print(f"⚠️  Could not write syntax cache: {e}")
+
+def _check_syntax(file_path):
+    """Return None if file_path parses, else a (kind, message) tuple"""
+    try:
+        # compile() decodes bytes itself, honouring any PEP 263 coding cookie
+        content = _slurp(file_path)[:]
+        
+        # Compile to check syntax without materializing a Python-level AST
+        compile(content, file_path, 'exec', dont_inherit=True, optimize=2)
+        return None
+    except SyntaxError as e:
+        return ('syntax error', str(e))
+    except Exception as e:
+        return ('error', str(e))
+
 def test_python_syntax():
     """Test Python files for syntax errors"""
     print("\n🔍 Testing Python syntax...")
@@ -63,22 +210,44 @@ def test_python_syntax():
     ]
     
     syntax_errors = []
+    cache = _load_syntax_cache()
+    results = {}
+    stale = {}
     
+    # Reuse the previous result while the file is unchanged
     for file_path in python_files:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Parse the AST to check syntax
-            ast.parse(content)
+            st = os.stat(file_path)
+        except OSError as e:
+            results[file_path] = ('error', str(e))
+            continue
+        entry = cache.get(file_path)
+        if entry and entry[:2] == [st.st_mtime_ns, st.st_size]:
+            results[file_path] = ('syntax error', entry[2]) if entry[2] else None
+        else:
+            stale[file_path] = st
+    
+    # Parse changed files in parallel; processes only pay off for large inputs
+    if stale:
+        large = sum(st.st_size for st in stale.values()) >= PARALLEL_PARSE_MIN_BYTES
+        executor_class = concurrent.futures.ProcessPoolExecutor if large else concurrent.futures.ThreadPoolExecutor
+        with executor_class() as executor:
+            for file_path, result in zip(stale, executor.map(_check_syntax, stale)):
+                results[file_path] = result
+                if result is None or result[0] == 'syntax error':
+                    st = stale[file_path]
+                    cache[file_path] = [st.st_mtime_ns, st.st_size, result and result[1]]
+    
+    for file_path in python_files:
+        result = results[file_path]
+        if result is None:
             print(f"✅ {file_path} - syntax OK")
-            
-        except SyntaxError as e:
-            syntax_errors.append(f"{file_path}: {e}")
-            print(f"❌ {file_path} - syntax error: {e}")
-        except Exception as e:
-            syntax_errors.append(f"{file_path}: {e}")
-            print(f"❌ {file_path} - error: {e}")
+        else:
+            kind, message = result
+            syntax_errors.append(f"{file_path}: {message}")
+            print(f"❌ {file_path} - {kind}: {message}")
+    
+    _save_syntax_cache(cache)
     
     if syntax_errors:
         return False
@@ -91,31 +260,23 @@ def test_api_endpoints():
     print("\n🔍 Testing API endpoint definitions...")
     
     try:
-        with open('backend/app.py', 'r', encoding='utf-8') as f:
-            content = f.read()
-        
+        content = _slurp('backend/app.py')
         # Check for required endpoints
-        required_endpoints = [
-            r'@app\.route\([\'\"]/api/health[\'\"]\)',
-            r'@app\.route\([\'\"]/api/upload[\'\"]\)',
-            r'@app\.route\([\'\"]/api/process/<[^>]+>[\'\"]\)',
-            r'@app\.route\([\'\"]/api/chat[\'\"]\)',
-            r'@app\.route\([\'\"]/api/export/<[^>]+>/<[^>]+>[\'\"]\)'
-        ]
+        matched = _matched(API_ENDPOINT_RE, API_ENDPOINT_LITERALS, content)
         
         found_endpoints = []
-        for endpoint_pattern in required_endpoints:
-            if re.search(endpoint_pattern, content):
+        for i, endpoint_pattern in enumerate(API_ENDPOINT_PATTERNS):
+            if i in matched:
                 found_endpoints.append(endpoint_pattern)
-                print(f"✅ Found endpoint: {endpoint_pattern}")
+                print(f"✅ Found endpoint: {endpoint_pattern.decode()}")
             else:
-                print(f"❌ Missing endpoint: {endpoint_pattern}")
+                print(f"❌ Missing endpoint: {endpoint_pattern.decode()}")
         
-        if len(found_endpoints) == len(required_endpoints):
+        if len(found_endpoints) == len(API_ENDPOINT_PATTERNS):
             print("✅ All required API endpoints defined")
             return True
         else:
-            print(f"❌ Missing {len(required_endpoints) - len(found_endpoints)} endpoints")
+            print(f"❌ Missing {len(API_ENDPOINT_PATTERNS) - len(found_endpoints)} endpoints")
             return False
             
     except Exception as e:
@@ -128,43 +289,18 @@ def test_frontend_structure():
     
     try:
         # Check HTML file
-        with open('frontend/index.html', 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
+        html_content = _slurp('frontend/index.html')
         # Check for required HTML elements
-        required_elements = [
-            r'<div[^>]*id=[\'"]uploadZone[\'"]',
-            r'<div[^>]*id=[\'"]resultsSection[\'"]',
-            r'<div[^>]*id=[\'"]chatTab[\'"]',
-            r'<input[^>]*id=[\'"]fileInput[\'"]',
-            r'<button[^>]*id=[\'"]sendChatBtn[\'"]'
-        ]
+        html_elements_found = len(_matched(HTML_ELEMENT_RE, HTML_ELEMENT_LITERALS, html_content))
         
-        html_elements_found = 0
-        for element_pattern in required_elements:
-            if re.search(element_pattern, html_content):
-                html_elements_found += 1
-        
-        print(f"✅ Found {html_elements_found}/{len(required_elements)} required HTML elements")
+        print(f"✅ Found {html_elements_found}/{len(HTML_ELEMENT_PATTERNS)} required HTML elements")
         
         # Check JavaScript file
-        with open('frontend/static/js/app.js', 'r', encoding='utf-8') as f:
-            js_content = f.read()
-        
+        js_content = _slurp('frontend/static/js/app.js')
         # Check for required JavaScript functions
-        required_functions = [
-            r'function\s+handleFileSelect',
-            r'function\s+sendMessage',
-            r'function\s+uploadDocument',
-            r'function\s+populateEventsTable'
-        ]
-        
-        js_functions_found = 0
-        for func_pattern in required_functions:
-            if re.search(func_pattern, js_content):
-                js_functions_found += 1
+        js_functions_found = len(_matched(JS_FUNC_RE, JS_FUNC_LITERALS, js_content))
         
-        print(f"✅ Found {js_functions_found}/{len(required_functions)} required JavaScript functions")
+        print(f"✅ Found {js_functions_found}/{len(JS_FUNC_PATTERNS)} required JavaScript functions")
         
         if html_elements_found >= 4 and js_functions_found >= 3:
             print("✅ Frontend structure looks good")
@@ -183,30 +319,16 @@ def test_docker_configuration():
     
     try:
         # Check docker-compose.yml
-        with open('docker-compose.yml', 'r', encoding='utf-8') as f:
-            compose_content = f.read()
+        compose_content = _slurp('docker-compose.yml')
+        services_found = len(_found(DOCKER_SERVICES_AUTOMATON, DOCKER_SERVICES, compose_content))
         
-        required_services = ['backend', 'db', 'redis', 'nginx']
-        services_found = 0
-        
-        for service in required_services:
-            if f'{service}:' in compose_content:
-                services_found += 1
-        
-        print(f"✅ Found {services_found}/{len(required_services)} required Docker services")
+        print(f"✅ Found {services_found}/{len(DOCKER_SERVICES)} required Docker services")
         
         # Check Dockerfile
-        with open('Dockerfile', 'r', encoding='utf-8') as f:
-            dockerfile_content = f.read()
-        
-        dockerfile_commands = ['FROM', 'WORKDIR', 'COPY', 'RUN', 'EXPOSE']
-        commands_found = 0
+        dockerfile_content = _slurp('Dockerfile')
+        commands_found = len(_found(DOCKERFILE_AUTOMATON, DOCKERFILE_COMMANDS, dockerfile_content))
         
-        for command in dockerfile_commands:
-            if command in dockerfile_content:
-                commands_found += 1
-        
-        print(f"✅ Found {commands_found}/{len(dockerfile_commands)} required Dockerfile commands")
+        print(f"✅ Found {commands_found}/{len(DOCKERFILE_COMMANDS)} required Dockerfile commands")
         
         if services_found >= 3 and commands_found >= 4:
             print("✅ Docker configuration looks good")
@@ -225,27 +347,23 @@ def test_configuration_files():
     
     try:
         # Check .env.example
-        with open('.env.example', 'r', encoding='utf-8') as f:
-            env_content = f.read()
-        
-        required_env_vars = ['FLASK_ENV', 'DATABASE_URL', 'REDIS_URL', 'SECRET_KEY']
+        required_env_vars = [b'FLASK_ENV', b'DATABASE_URL', b'REDIS_URL', b'SECRET_KEY']
         env_vars_found = 0
         
+        env_content = _slurp('.env.example')
         for var in required_env_vars:
-            if var in env_content:
+            if env_content.find(var) != -1:
                 env_vars_found += 1
         
         print(f"✅ Found {env_vars_found}/{len(required_env_vars)} required environment variables")
         
         # Check README.md
-        with open('README.md', 'r', encoding='utf-8') as f:
-            readme_content = f.read()
-        
-        readme_sections = ['# SoF Event Extractor', '## Features', '## Installation', '## API Documentation']
+        readme_sections = [b'# SoF Event Extractor', b'## Features', b'## Installation', b'## API Documentation']
         sections_found = 0
         
+        readme_content = _slurp('README.md')
         for section in readme_sections:
-            if section in readme_content:
+            if readme_content.find(section) != -1:
                 sections_found += 1
         
         print(f"✅ Found {sections_found}/{len(readme_sections)} required README sections")
@@ -278,15 +396,18 @@ def main():
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        try:
-            if test_func():
-                passed += 1
-                print(f"✅ {test_name} PASSED\n")
-            else:
-                print(f"❌ {test_name} FAILED\n")
-        except Exception as e:
-            print(f"❌ {test_name} FAILED with exception: {e}\n")
+    try:
+        for test_name, test_func in tests:
+            try:
+                if test_func():
+                    passed += 1
+                    print(f"✅ {test_name} PASSED\n")
+                else:
+                    print(f"❌ {test_name} FAILED\n")
+            except Exception as e:
+                print(f"❌ {test_name} FAILED with exception: {e}\n")
+    finally:
+        _release_files()
     
     print("=" * 55)
     print(f"📊 Test Results: {passed}/{total} tests passed")
@@ -12,9 +12,11 @@ class Document(db.Model):
     file_path = db.Column(db.String(500), nullable=False)
     file_size = db.Column(db.Integer, nullable=False)
     file_hash = db.Column(db.String(64), nullable=False, unique=True)
+    hash_algorithm = db.Column(db.String(16), nullable=False, default='sha256')
     status = db.Column(db.String(20), default='uploaded')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed_at = db.Column(db.DateTime)
+    events = db.relationship('Event', backref='document', lazy=True, order_by='Event.created_at')
 
     def to_dict(self):
         return {
@@ -29,6 +31,8 @@ class Document(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    # Also serves lookups by document_id alone, as its leading column
+    __table_args__ = (db.Index('ix_events_doc_type', 'document_id', 'event_type'),)
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
     event_type = db.Column(db.String(50), nullable=False)
@@ -36,6 +40,7 @@ class Event(db.Model):
     start_time = db.Column(db.String(50))
     end_time = db.Column(db.String(50))
     duration = db.Column(db.String(20))
+    duration_minutes = db.Column(db.Integer)
     location = db.Column(db.String(255))
     remarks = db.Column(db.Text)
     confidence = db.Column(db.Float, default=0.0)
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Create the SoF Event Extractor database tables
+Run by setup_workspace.py with the workspace virtual environment
+"""
+
+import os
+import sys
+
+# Make the app importable when run as scripts/init_db.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+
+with app.app_context():
+    db.create_all()
+    print("Database tables created successfully!")
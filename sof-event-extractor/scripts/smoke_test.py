@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Check that the SoF Event Extractor Flask app imports and creates a context
+Run by setup_workspace.py with the workspace virtual environment
+"""
+
+import os
+import sys
+
+# Make the app importable when run as scripts/smoke_test.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from app import app
+    print("✅ Flask app imported successfully")
+    with app.app_context():
+        print("✅ Flask app context created successfully")
+except Exception as e:
+    print(f"❌ Flask app test failed: {e}")
+    sys.exit(1)
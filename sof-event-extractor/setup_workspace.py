@@ -6,10 +6,50 @@ Automated setup for development environment
 
 import os
 import sys
+import hashlib
 import subprocess
-import platform
+import shutil
+import venv
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 
+CURL_PATH = shutil.which("curl")
+
+IS_WINDOWS = os.name == "nt"
+
+# Helper scripts run inside the venv; kept as files so their bytecode is cached
+SCRIPTS_DIR = Path("scripts")
+
+# Already running inside a virtual environment (PEP 405), e.g. in CI or Docker
+IN_VENV = sys.prefix != sys.base_prefix
+
+# Interpreter used for every step after the venv exists
+if IN_VENV:
+    VENV_PY = sys.executable
+else:
+    VENV_PY = str(Path("venv") / ("Scripts" if IS_WINDOWS else "bin") / ("python.exe" if IS_WINDOWS else "python"))
+
+# Default .env written by create_env_file
+_ENV_BYTES = b"""# SoF Event Extractor Configuration
+# Flask Configuration
+FLASK_ENV=development
+FLASK_DEBUG=1
+SECRET_KEY=dev-secret-key-change-in-production
+
+# Database Configuration
+DATABASE_URL=sqlite:///sof_extractor.db
+SQLALCHEMY_TRACK_MODIFICATIONS=False
+
+# File Upload Configuration
+UPLOAD_FOLDER=uploads
+MAX_CONTENT_LENGTH=10485760
+
+# Logging Configuration
+LOG_LEVEL=INFO
+LOG_FILE=app.log
+"""
+
 def print_header():
     """Print welcome header"""
     print("🚢" + "=" * 60)
@@ -18,37 +58,35 @@ def print_header():
     print("=" * 62)
     print()
 
-def run_command(command, description, cwd=None, shell=True):
-    """Run a command and handle errors"""
+def run_command(command, description, cwd=None):
+    """Run an argv list (no shell) and handle errors"""
+    if not isinstance(command, list):
+        raise TypeError(f"run_command expects an argv list, got {type(command).__name__}")
+
     print(f"🔄 {description}...")
     try:
-        if isinstance(command, list):
-            result = subprocess.run(
-                command,
-                check=True,
-                cwd=cwd,
-                capture_output=True,
-                text=True,
-                shell=shell
-            )
-        else:
-            result = subprocess.run(
-                command,
-                shell=True,
-                check=True,
-                cwd=cwd,
-                capture_output=True,
-                text=True
-            )
+        result = subprocess.run(
+            command,
+            check=True,
+            cwd=cwd,
+            capture_output=True,
+            text=True
+        )
         print(f"✅ {description} completed successfully")
         return True, result.stdout
     except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed: {e}")
+        # Emit the whole failure report in one write
+        report = [f"❌ {description} failed: {e}"]
         if e.stdout:
-            print(f"   Output: {e.stdout}")
+            report.append(f"   Output: {e.stdout}")
         if e.stderr:
-            print(f"   Error: {e.stderr}")
+            report.append(f"   Error: {e.stderr}")
+        print("\n".join(report))
         return False, e.stderr
+    except OSError as e:
+        # Without a shell, a missing executable raises instead of exiting 127
+        print(f"❌ {description} failed: {e}")
+        return False, str(e)
 
 def check_python_version():
     """Check if Python version is compatible"""
@@ -63,73 +101,91 @@ def check_python_version():
 def check_system_dependencies():
     """Check if required system dependencies are available"""
     dependencies = {
-        'git': 'git --version',
-        'pip': 'pip --version',
-        'curl': 'curl --version' if platform.system() != 'Windows' else 'powershell -Command "Get-Command curl"'
+        'git': ['git', '--version'],
+        'pip': ['pip', '--version']
     }
 
-    available = {}
-    for name, command in dependencies.items():
-        try:
-            subprocess.run(command, shell=True, check=True, capture_output=True)
-            available[name] = True
+    # The probes are independent, so run them concurrently
+    with ThreadPoolExecutor(max_workers=len(dependencies)) as executor:
+        results = executor.map(_probe, dependencies.values())
+        available = dict(zip(dependencies, results))
+
+    # curl is only looked up on PATH, which works the same on every platform
+    available['curl'] = CURL_PATH is not None
+
+    for name, found in available.items():
+        if found:
             print(f"✅ {name} is available")
-        except subprocess.CalledProcessError:
-            available[name] = False
+        else:
             print(f"⚠️  {name} is not available (optional)")
 
     return available
 
-def setup_virtual_environment():
+def _probe(command):
+    """Return True if command runs and exits successfully"""
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=10)
+        return True
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+
+def setup_virtual_environment(cwd_entries):
     """Set up Python virtual environment"""
     venv_dir = Path("venv")
 
-    if venv_dir.exists():
+    if IN_VENV:
+        print(f"✅ Using the active virtual environment: {sys.prefix}")
+        return True
+
+    if "venv" in cwd_entries:
         print("✅ Virtual environment already exists")
         return True
 
-    success, output = run_command(
-        "python -m venv venv",
-        "Creating Python virtual environment"
-    )
-    return success
+    # Build the venv in-process instead of spawning "python -m venv"
+    description = "Creating Python virtual environment"
+    print(f"🔄 {description}...")
+    try:
+        venv.EnvBuilder(with_pip=True, symlinks=not IS_WINDOWS).create(venv_dir)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"❌ {description} failed: {e}")
+        return False
+    print(f"✅ {description} completed successfully")
+    return True
 
-def install_dependencies():
+def install_dependencies(cwd_entries):
     """Install Python dependencies"""
     requirements_file = Path("requirements.txt")
-    if not requirements_file.exists():
+    if "requirements.txt" not in cwd_entries:
         print("⚠️  requirements.txt not found, skipping dependency installation")
         return True
 
-    # Determine pip command based on OS
-    if platform.system() == "Windows":
-        pip_command = "venv\\Scripts\\pip install -r requirements.txt"
-    else:
-        pip_command = "venv/bin/pip install -r requirements.txt"
+    # Skip pip entirely when this environment already installed these requirements
+    stamp_file = Path(sys.prefix if IN_VENV else "venv") / ".reqs.sha256"
+    wanted = hashlib.sha256(requirements_file.read_bytes()).hexdigest()
+    try:
+        if stamp_file.read_text() == wanted:
+            print("✅ requirements.txt unchanged, skipping dependency installation")
+            return True
+    except OSError:
+        pass
 
     success, output = run_command(
-        pip_command,
+        [VENV_PY, "-m", "pip", "install", "-r", str(requirements_file)],
         "Installing Python dependencies"
     )
+
+    if success:
+        try:
+            stamp_file.write_text(wanted)
+        except OSError as e:
+            print(f"⚠️  Could not record installed requirements: {e}")
+
     return success
 
 def initialize_database():
     """Initialize the database"""
-    init_script = '''
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print("Database tables created successfully!")
-'''
-
-    # Determine python command based on OS
-    if platform.system() == "Windows":
-        python_command = f'venv\\Scripts\\python -c "{init_script}"'
-    else:
-        python_command = f'venv/bin/python -c "{init_script}"'
-
     success, output = run_command(
-        python_command,
+        [VENV_PY, str(SCRIPTS_DIR / "init_db.py")],
         "Initializing database"
     )
 
@@ -138,7 +194,7 @@ with app.app_context():
 
     return success
 
-def create_directories():
+def create_directories(cwd_entries):
     """Create necessary directories"""
     directories = [
         "uploads",
@@ -148,73 +204,48 @@ def create_directories():
     ]
 
     for directory in directories:
-        dir_path = Path(directory)
-        if not dir_path.exists():
-            dir_path.mkdir(parents=True, exist_ok=True)
+        if directory in cwd_entries:
+            print(f"✅ Directory exists: {directory}")
+            continue
+        # A single mkdir; EEXIST tells us it was created since the scan
+        try:
+            Path(directory).mkdir(parents=True)
             print(f"✅ Created directory: {directory}")
-        else:
+        except FileExistsError:
             print(f"✅ Directory exists: {directory}")
 
     return True
 
-def create_env_file():
+def create_env_file(cwd_entries):
     """Create .env file with default configuration"""
-    env_file = Path(".env")
-    if env_file.exists():
+    if ".env" in cwd_entries:
         print("✅ .env file already exists")
         return True
 
-    env_content = """# SoF Event Extractor Configuration
-# Flask Configuration
-FLASK_ENV=development
-FLASK_DEBUG=1
-SECRET_KEY=dev-secret-key-change-in-production
-
-# Database Configuration
-DATABASE_URL=sqlite:///sof_extractor.db
-SQLALCHEMY_TRACK_MODIFICATIONS=False
-
-# File Upload Configuration
-UPLOAD_FOLDER=uploads
-MAX_CONTENT_LENGTH=10485760
-
-# Logging Configuration
-LOG_LEVEL=INFO
-LOG_FILE=app.log
-"""
+    try:
+        # O_EXCL makes the create fail atomically if .env appeared since the scan
+        fd = os.open(".env", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        print("✅ .env file already exists")
+        return True
+    except OSError as e:
+        print(f"❌ Failed to create .env file: {e}")
+        return False
 
     try:
-        with open(env_file, 'w') as f:
-            f.write(env_content)
+        os.write(fd, _ENV_BYTES)
         print("✅ Created .env file with default configuration")
         return True
-    except Exception as e:
+    except OSError as e:
         print(f"❌ Failed to create .env file: {e}")
         return False
+    finally:
+        os.close(fd)
 
 def test_flask_app():
     """Test if Flask app can be imported and run"""
-    test_script = '''
-import sys
-sys.path.insert(0, ".")
-try:
-    from app import app
-    print("✅ Flask app imported successfully")
-    with app.app_context():
-        print("✅ Flask app context created successfully")
-except Exception as e:
-    print(f"❌ Flask app test failed: {e}")
-    sys.exit(1)
-'''
-
-    # Determine python command based on OS
-    if platform.system() == "Windows":
-        python_command = f'venv\\Scripts\\python -c "{test_script}"'
-    else:
-        python_command = f'venv/bin/python -c "{test_script}"'
-
     success, output = run_command(
-        python_command,
+        [VENV_PY, str(SCRIPTS_DIR / "smoke_test.py")],
         "Testing Flask application"
     )
 
@@ -256,11 +287,15 @@ def main():
     dependencies = check_system_dependencies()
 
     # Setup steps
+    # One directory listing answers every "does X exist here" check below
+    with os.scandir(".") as it:
+        cwd_entries = {entry.name: entry for entry in it}
+
     steps = [
-        ("Creating directories", create_directories),
-        ("Setting up virtual environment", setup_virtual_environment),
-        ("Installing dependencies", install_dependencies),
-        ("Creating configuration file", create_env_file),
+        ("Creating directories", partial(create_directories, cwd_entries)),
+        ("Setting up virtual environment", partial(setup_virtual_environment, cwd_entries)),
+        ("Installing dependencies", partial(install_dependencies, cwd_entries)),
+        ("Creating configuration file", partial(create_env_file, cwd_entries)),
         ("Initializing database", initialize_database),
         ("Testing Flask application", test_flask_app)
     ]
@@ -1,16 +1,60 @@
+import hashlib
+import mmap
+import os
+import time
+import uuid
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+# Upload dedup hash: "sha256" (default) or "blake3", chosen explicitly and never per host.
+# Stored with each document so algorithms never get compared.
+HASH_ALGO = os.environ.get("FILE_HASH_ALGORITHM", "sha256")
+if HASH_ALGO not in ("sha256", "blake3"):
+    raise ValueError(f"Unsupported hash algorithm: {HASH_ALGO}")
+if HASH_ALGO == "blake3" and blake3 is None:
+    raise RuntimeError("blake3 package is not installed")
+
+_ALLOWED_SUFFIXES = ('.pdf', '.doc', '.docx')
+
 def allowed_file(filename):
     if not filename:
         return False
-    allowed_extensions = {'pdf', 'doc', 'docx'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
 
 def get_file_hash(file_path):
-    import hashlib
     try:
-        hash_sha256 = hashlib.sha256()
         with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+            # file_digest (3.11+) runs the read/update loop in C
+            if hasattr(hashlib, "file_digest"):
+                return hashlib.file_digest(f, "sha256").hexdigest()
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap refuses empty files
+                return hashlib.sha256().hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
     except Exception:
-        return ""
\ No newline at end of file
+        return ""
+
+def hash_and_persist(src, dst_path):
+    hasher = blake3() if HASH_ALGO == "blake3" else hashlib.sha256()
+    with open(dst_path, "wb") as dst:
+        # SpooledTemporaryFile only has readinto() from Python 3.11
+        if hasattr(src, "readinto"):
+            buffer = memoryview(bytearray(1 << 20))
+            while (read := src.readinto(buffer)):
+                hasher.update(buffer[:read])
+                dst.write(buffer[:read])
+        else:
+            while (chunk := src.read(1 << 20)):
+                hasher.update(chunk)
+                dst.write(chunk)
+    return hasher.hexdigest()
+
+def generate_sortable_id():
+    rand = int.from_bytes(os.urandom(16), 'big')
+    value = ((time.time_ns() // 1_000_000) << 80 | 0x7 << 76 | (rand >> 64 & 0xFFF) << 64
+             | 0b10 << 62 | rand & 0x3FFFFFFFFFFFFFFF)
+    return str(uuid.UUID(int=value))
@@ -6,92 +6,303 @@ Tests core components without full Docker setup
 
 import sys
 import os
+import io
+import logging
 import tempfile
 from datetime import datetime
+from functools import lru_cache
+from importlib.util import find_spec
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
+IMPORT_CHECKS = (
+    ('config', 'Config'),
+    ('models', 'Models'),
+    ('services.document_processor', 'DocumentProcessor'),
+    ('services.event_extractor', 'EventExtractor'),
+    ('services.ai_service', 'AIService'),
+    ('utils.helpers', 'Utils'),
+)
+
+# Report lines, written to stdout in one go when main() finishes
+_LOG = []
+
+def _log(line=""):
+    """Queue one line of report output"""
+    _LOG.append(line)
+    _LOG.append("\n")
+
+@lru_cache(maxsize=1)
+def _extractor():
+    """Shared EventExtractor, built once per run"""
+    from services.event_extractor import EventExtractor
+    return EventExtractor()
+
+@lru_cache(maxsize=1)
+def _ai():
+    """Shared AIService, built once per run"""
+    from services.ai_service import AIService
+    return AIService()
+
+@lru_cache(maxsize=1)
+def _backend():
+    """Backend app module on an in-memory database, imported once per run"""
+    # Configure logging first so the app's basicConfig does not log INFO lines
+    logging.basicConfig(level=logging.WARNING)
+    os.environ['DATABASE_URL'] = 'sqlite://'
+    
+    # app.py still opens app.log in the working directory on import
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            import app
+        finally:
+            os.chdir(cwd)
+    return app
+
 def test_imports():
-    """Test if all required modules can be imported"""
-    print("🔍 Testing imports...")
+    """Test if all required modules can be found"""
+    _log("🔍 Testing imports...")
     
-    try:
-        from config import Config
-        print("✅ Config import successful")
-    except Exception as e:
-        print(f"❌ Config import failed: {e}")
-        return False
+    # find_spec locates each module without executing it; the tests below
+    # import the modules whose behaviour they actually exercise
+    for module_name, label in IMPORT_CHECKS:
+        try:
+            found = find_spec(module_name) is not None
+            error = f"No module named '{module_name}'"
+        except Exception as e:
+            # Locating a submodule still imports its parent package
+            found = False
+            error = e
+        
+        if not found:
+            _log(f"❌ {label} import failed: {error}")
+            return False
+        _log(f"✅ {label} import successful")
+    
+    return True
+
+def test_file_validation():
+    """Test file validation functions"""
+    _log("\n🔍 Testing file validation...")
     
     try:
-        from models import Document, Event
-        print("✅ Models import successful")
+        from utils.helpers import allowed_file
+        
+        # Test valid files
+        assert allowed_file('document.pdf') == True
+        assert allowed_file('document.doc') == True
+        assert allowed_file('document.docx') == True
+        _log("✅ Valid file extensions accepted")
+        
+        # Test invalid files
+        assert allowed_file('document.txt') == False
+        assert allowed_file('document.jpg') == False
+        assert allowed_file('') == False
+        _log("✅ Invalid file extensions rejected")
+        
+        return True
     except Exception as e:
-        print(f"❌ Models import failed: {e}")
+        _log(f"❌ File validation test failed: {e}")
         return False
+
+def test_datetime_parsing():
+    """Test that ISO timestamps with and without offsets parse to naive UTC"""
+    _log("\n🔍 Testing datetime parsing...")
     
     try:
-        from services.document_processor import DocumentProcessor
-        print("✅ DocumentProcessor import successful")
+        from utils.helpers import parse_datetime, parse_datetime_with_regex
+        
+        # Regex path, which never sees an offset
+        baseline = parse_datetime_with_regex('15/03/2024 06:45')
+        assert baseline == datetime(2024, 3, 15, 6, 45)
+        
+        for value in (
+            '2024-03-15 06:45',
+            '2024/03/15 06:45',
+            '2024-03-15T06:45:00Z',
+            '2024-03-15T08:45:00+02:00',
+            '2024-03-14T22:45:00-08:00',
+        ):
+            parsed = parse_datetime(value)
+            assert parsed == baseline, f"{value} -> {parsed}"
+            assert parsed.tzinfo is None, f"{value} kept tzinfo"
+        _log("✅ Offset and naive ISO inputs match the regex path as naive UTC")
+        
+        assert parse_datetime('15/03/2024 06:45') == baseline
+        assert parse_datetime('not a date') is None
+        _log("✅ Non-ISO inputs still use the format and regex paths")
+        
+        return True
     except Exception as e:
-        print(f"❌ DocumentProcessor import failed: {e}")
+        _log(f"❌ Datetime parsing test failed: {e}")
         return False
+
+def test_file_hashing():
+    """Test the sha256-tree digest against a reference implementation"""
+    _log("\n🔍 Testing file hashing...")
     
     try:
-        from services.event_extractor import EventExtractor
-        print("✅ EventExtractor import successful")
+        import hashlib
+        from utils.helpers import get_file_hash
+        
+        leaf = 8 << 20
+        with tempfile.TemporaryDirectory() as tmp:
+            # Two full leaves plus a partial one
+            data = os.urandom(2 * leaf + 123)
+            path = os.path.join(tmp, 'large.bin')
+            with open(path, 'wb') as f:
+                f.write(data)
+            expected = hashlib.sha256(b"".join(
+                hashlib.sha256(data[i:i + leaf]).digest() for i in range(0, len(data), leaf)
+            )).hexdigest()
+            assert get_file_hash(path, 'sha256-tree') == expected
+            assert get_file_hash(path) == hashlib.sha256(data).hexdigest()
+            _log("✅ sha256-tree matches the reference digest")
+            
+            empty = os.path.join(tmp, 'empty.bin')
+            open(empty, 'wb').close()
+            assert get_file_hash(empty, 'sha256-tree') == \
+                hashlib.sha256(hashlib.sha256(b"").digest()).hexdigest()
+            assert get_file_hash(empty) == hashlib.sha256(b"").hexdigest()
+            _log("✅ Empty files hash as a single empty leaf")
+        
+        return True
     except Exception as e:
-        print(f"❌ EventExtractor import failed: {e}")
+        _log(f"❌ File hashing test failed: {e}")
         return False
+
+def test_hash_and_persist():
+    """Test that uploads are copied and hashed the same with and without readinto"""
+    _log("\n🔍 Testing upload persistence...")
+    
+    class ReadOnlyStream:
+        """File-like object with read() only, like SpooledTemporaryFile before 3.11"""
+        
+        def __init__(self, data):
+            self._stream = io.BytesIO(data)
+        
+        def read(self, size=-1):
+            return self._stream.read(size)
     
     try:
-        from services.ai_service import AIService
-        print("✅ AIService import successful")
+        import hashlib
+        from utils.helpers import hash_and_persist, get_file_hash
+        
+        # Spans several 1 MiB copy buffers and ends mid-buffer
+        data = os.urandom(3 * (1 << 20) + 7)
+        expected = hashlib.sha256(data).hexdigest()
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, src in (('readinto', io.BytesIO(data)), ('read', ReadOnlyStream(data))):
+                assert hasattr(src, 'readinto') == (label == 'readinto')
+                dst_path = os.path.join(tmp, f'{label}.pdf')
+                assert hash_and_persist(src, dst_path) == expected
+                with open(dst_path, 'rb') as f:
+                    assert f.read() == data
+                assert get_file_hash(dst_path) == expected
+                _log(f"✅ Streams using {label}() are copied and hashed intact")
+            
+            empty_path = os.path.join(tmp, 'empty.pdf')
+            assert hash_and_persist(ReadOnlyStream(b""), empty_path) == hashlib.sha256(b"").hexdigest()
+            assert os.path.getsize(empty_path) == 0
+            _log("✅ Empty uploads produce an empty file")
+        
+        return True
     except Exception as e:
-        print(f"❌ AIService import failed: {e}")
+        _log(f"❌ Upload persistence test failed: {e}")
         return False
+
+def test_sortable_ids():
+    """Test that primary key ids are RFC 4122 UUIDv7 values"""
+    _log("\n🔍 Testing sortable ids...")
     
     try:
-        from utils.helpers import allowed_file, get_file_hash
-        print("✅ Utils import successful")
+        import uuid
+        from utils.helpers import generate_sortable_id
+        
+        ids = [generate_sortable_id() for _ in range(100)]
+        for value in ids:
+            parsed = uuid.UUID(value)
+            assert parsed.version == 7
+            assert parsed.variant == uuid.RFC_4122
+        assert len(set(ids)) == len(ids)
+        _log("✅ Ids are unique UUIDv7 values with the RFC 4122 variant")
+        
+        # The leading 48 bits are the Unix time in milliseconds
+        millis = uuid.UUID(generate_sortable_id()).int >> 80
+        assert abs(millis - datetime.now().timestamp() * 1000) < 60_000
+        _log("✅ Ids carry the current millisecond timestamp")
+        
+        return True
     except Exception as e:
-        print(f"❌ Utils import failed: {e}")
+        _log(f"❌ Sortable id test failed: {e}")
         return False
-    
-    return True
 
-def test_file_validation():
-    """Test file validation functions"""
-    print("\n🔍 Testing file validation...")
+def test_event_durations():
+    """Test duration parsing, the duration_minutes backfill and summary totals"""
+    _log("\n🔍 Testing event durations...")
     
     try:
-        from utils.helpers import allowed_file
+        backend = _backend()
         
-        # Test valid files
-        assert allowed_file('document.pdf') == True
-        assert allowed_file('document.doc') == True
-        assert allowed_file('document.docx') == True
-        print("✅ Valid file extensions accepted")
+        assert backend.duration_to_minutes('7:45:00') == 465
+        assert backend.duration_to_minutes('0:25:00') == 25
+        assert backend.duration_to_minutes('12:05:30') == 725
+        assert backend.duration_to_minutes('7:45') is None
+        assert backend.duration_to_minutes(None) is None
+        _log("✅ Durations convert to whole minutes")
         
-        # Test invalid files
-        assert allowed_file('document.txt') == False
-        assert allowed_file('document.jpg') == False
-        assert allowed_file('') == False
-        print("✅ Invalid file extensions rejected")
+        with backend.app.app_context():
+            session = backend.db.session
+            document = backend.Document(
+                filename='sof.pdf', original_filename='sof.pdf', file_path='sof.pdf',
+                file_size=1, file_hash='0' * 64, status='processed'
+            )
+            session.add(document)
+            session.flush()
+            
+            # Events stored before duration_minutes existed have it unset
+            for event_type, duration, confidence in (
+                ('loading', '7:45:00', 0.9),
+                ('arrival', '0:25:00', 0.8),
+                ('weather', 'unknown', 0.7),
+            ):
+                session.add(backend.Event(
+                    document_id=document.id, event_type=event_type, event_name=event_type.title(),
+                    duration=duration, confidence=confidence
+                ))
+            session.commit()
+            document_id = document.id
+            
+            assert backend.backfill_duration_minutes() == 3
+            # Unparseable durations stay unset; parsed ones are not revisited
+            assert backend.backfill_duration_minutes() == 1
+        _log("✅ duration_minutes backfilled from stored durations")
+        
+        response = backend.app.test_client().get(f'/api/documents/{document_id}/summary')
+        assert response.status_code == 200
+        summary = response.get_json()
+        stats = summary['statistics']
+        assert summary['document_info']['total_events'] == 3
+        assert stats['event_distribution'] == {'loading': 1, 'arrival': 1, 'weather': 1}
+        assert stats['total_duration_minutes'] == 490
+        assert abs(stats['average_confidence'] - 0.8) < 1e-9
+        _log("✅ Summary totals match the stored events")
         
         return True
     except Exception as e:
-        print(f"❌ File validation test failed: {e}")
+        _log(f"❌ Event duration test failed: {e}")
         return False
 
 def test_event_extractor():
     """Test event extraction with sample text"""
-    print("\n🔍 Testing event extraction...")
+    _log("\n🔍 Testing event extraction...")
     
     try:
-        from services.event_extractor import EventExtractor
-        
-        extractor = EventExtractor()
+        extractor = _extractor()
         
         # Sample maritime text
         sample_text = """
@@ -106,45 +317,43 @@ def test_event_extractor():
         events = extractor.extract_events(sample_text)
         
         if len(events) > 0:
-            print(f"✅ Extracted {len(events)} events from sample text")
+            _log(f"✅ Extracted {len(events)} events from sample text")
             for i, event in enumerate(events[:3]):  # Show first 3 events
-                print(f"   Event {i+1}: {event.get('event', 'Unknown')} ({event.get('event_type', 'unknown')})")
+                _log(f"   Event {i+1}: {event.get('event', 'Unknown')} ({event.get('event_type', 'unknown')})")
             return True
         else:
-            print("❌ No events extracted from sample text")
+            _log("❌ No events extracted from sample text")
             return False
             
     except Exception as e:
-        print(f"❌ Event extraction test failed: {e}")
+        _log(f"❌ Event extraction test failed: {e}")
         return False
 
 def test_ai_service():
     """Test AI service responses"""
-    print("\n🔍 Testing AI service...")
+    _log("\n🔍 Testing AI service...")
     
     try:
-        from services.ai_service import AIService
-        
-        ai_service = AIService()
+        ai_service = _ai()
         
         # Test basic response generation
         response = ai_service.generate_response("Hello", None)
         
         if response and len(response) > 0:
-            print("✅ AI service generated response")
-            print(f"   Sample response: {response[:100]}...")
+            _log("✅ AI service generated response")
+            _log(f"   Sample response: {response[:100]}...")
             return True
         else:
-            print("❌ AI service failed to generate response")
+            _log("❌ AI service failed to generate response")
             return False
             
     except Exception as e:
-        print(f"❌ AI service test failed: {e}")
+        _log(f"❌ AI service test failed: {e}")
         return False
 
 def test_document_processor():
     """Test document processor with a simple text file"""
-    print("\n🔍 Testing document processor...")
+    _log("\n🔍 Testing document processor...")
     
     try:
         from services.document_processor import DocumentProcessor
@@ -159,7 +368,7 @@ def test_document_processor():
         try:
             # Test file validation
             validation = processor.validate_document(temp_file)
-            print(f"✅ Document validation completed: {validation.get('file_exists', False)}")
+            _log(f"✅ Document validation completed: {validation.get('file_exists', False)}")
             
             return True
         finally:
@@ -167,17 +376,22 @@ def test_document_processor():
             os.unlink(temp_file)
             
     except Exception as e:
-        print(f"❌ Document processor test failed: {e}")
+        _log(f"❌ Document processor test failed: {e}")
         return False
 
 def main():
     """Run all basic functionality tests"""
-    print("🚢 SoF Event Extractor - Basic Functionality Test")
-    print("=" * 50)
+    _log("🚢 SoF Event Extractor - Basic Functionality Test")
+    _log("=" * 50)
     
     tests = [
         ("Import Tests", test_imports),
         ("File Validation", test_file_validation),
+        ("Datetime Parsing", test_datetime_parsing),
+        ("File Hashing", test_file_hashing),
+        ("Upload Persistence", test_hash_and_persist),
+        ("Sortable IDs", test_sortable_ids),
+        ("Event Durations", test_event_durations),
         ("Event Extraction", test_event_extractor),
         ("AI Service", test_ai_service),
         ("Document Processor", test_document_processor),
@@ -186,26 +400,31 @@ def main():
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        print(f"\n📋 Running {test_name}...")
-        try:
-            if test_func():
-                passed += 1
-                print(f"✅ {test_name} PASSED")
-            else:
-                print(f"❌ {test_name} FAILED")
-        except Exception as e:
-            print(f"❌ {test_name} FAILED with exception: {e}")
-    
-    print("\n" + "=" * 50)
-    print(f"📊 Test Results: {passed}/{total} tests passed")
-    
-    if passed == total:
-        print("🎉 All basic functionality tests PASSED!")
-        return True
-    else:
-        print("⚠️  Some tests failed. Check the output above for details.")
-        return False
+    try:
+        for test_name, test_func in tests:
+            _log(f"\n📋 Running {test_name}...")
+            try:
+                if test_func():
+                    passed += 1
+                    _log(f"✅ {test_name} PASSED")
+                else:
+                    _log(f"❌ {test_name} FAILED")
+            except Exception as e:
+                _log(f"❌ {test_name} FAILED with exception: {e}")
+        
+        _log("\n" + "=" * 50)
+        _log(f"📊 Test Results: {passed}/{total} tests passed")
+        
+        if passed == total:
+            _log("🎉 All basic functionality tests PASSED!")
+            return True
+        else:
+            _log("⚠️  Some tests failed. Check the output above for details.")
+            return False
+    finally:
+        sys.stdout.write("".join(_LOG))
+        sys.stdout.flush()
+        _LOG.clear()
 
 if __name__ == "__main__":
     success = main()